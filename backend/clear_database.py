@@ -1,5 +1,4 @@
-from main import DB_PATH, init_db
-import sqlite3
+from main import connect_db, init_db
 
 
 def clear_database() -> None:
@@ -7,7 +6,7 @@ def clear_database() -> None:
     
     init_db()  # Ensure tables exist
     
-    conn = sqlite3.connect(DB_PATH)
+    conn = connect_db()
     try:
         cur = conn.cursor()
         
@@ -18,6 +17,7 @@ def clear_database() -> None:
         # Clear waste events
         cur.execute("DELETE FROM waste_events")
         waste_count = cur.rowcount
+        cur.execute("DELETE FROM waste_daily_rollup")
         
         conn.commit()
         
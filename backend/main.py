@@ -1,16 +1,25 @@
 from typing import List
-from contextlib import asynccontextmanager
 
+import asyncio
 import os
+import queue
+import re
 import sqlite3
-from contextlib import contextmanager
 import hashlib
 import binascii
 import secrets
-from datetime import datetime, timedelta
-
-from fastapi import FastAPI, HTTPException, UploadFile, File
+import sys
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import orjson
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
 try:
@@ -18,25 +27,101 @@ try:
 except ImportError:
     genai = None
 
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+    ARGON2_AVAILABLE = True
+except ImportError:
+    ARGON2_AVAILABLE = False
+
+try:
+    # Missing on CPython builds without OpenSSL (no _ssl extension)
+    import ssl
+except ImportError:
+    ssl = None
+
+try:
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+    CRYPTOGRAPHY_AVAILABLE = True
+except ImportError:
+    CRYPTOGRAPHY_AVAILABLE = False
+
 try:
     import cv2
     import numpy as np
-    from PIL import Image
-    import io
     CV_AVAILABLE = True
 except ImportError:
     CV_AVAILABLE = False
 
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGRX
+    # Loads libturbojpeg; raises if the shared library is not installed
+    _turbojpeg = TurboJPEG()
+    TURBOJPEG_AVAILABLE = True
+except (ImportError, OSError, RuntimeError):
+    TURBOJPEG_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+try:
+    # SIMD (SSSE3/AVX2) drop-in for the stdlib module; used for Gemini image payloads
+    import pybase64 as base64
+except ImportError:
+    import base64
+
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "pantry.db")
+# Password hashing scheme for new hashes: "argon2" (requires argon2-cffi) or
+# "pbkdf2_sha256". Existing hashes are always verified by their own prefix.
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "argon2")
+# Freshness metrics are global image statistics, so uploads are shrunk to this
+# many pixels on the long edge before any per-pixel work.
+FRESHNESS_MAX_DIM = 256
+# Gemini only needs a modest resolution to recognize a food item, so photos
+# are re-encoded to this size and JPEG quality before upload.
+VISION_MAX_DIM = 768
+VISION_JPEG_QUALITY = 70
+# Number of SQLite connections kept open for request handlers.
+DB_POOL_SIZE = 8
+# Gemini recipe suggestions are reused for an unchanged pantry for this long.
+RECIPE_CACHE_TTL_SECONDS = 60 * 60
+RECIPE_CACHE_MAX_ENTRIES = 256
+# Food recognition results are reused for byte-identical uploads (client retries).
+RECOGNITION_CACHE_TTL_SECONDS = 24 * 60 * 60
+RECOGNITION_CACHE_MAX_ENTRIES = 1024
+# Chunk size for reading uploads whose size the client did not declare.
+UPLOAD_READ_CHUNK_BYTES = 64 * 1024
+# Larger image uploads are rejected with 413 before any decoding.
+MAX_IMAGE_BYTES = 8 << 20
+# Image upload requests whose Content-Length exceeds the image cap plus room
+# for multipart boundaries and part headers are refused before the body is read.
+IMAGE_UPLOAD_PATHS = frozenset({"/ai/freshness", "/ai/recognize"})
+MAX_IMAGE_REQUEST_BYTES = MAX_IMAGE_BYTES + 64 * 1024
+
+
+# Bump together with a new `if version < N` block in init_db.
+SCHEMA_VERSION = 3
+
+
+def _add_column_if_missing(conn: sqlite3.Connection, table: str, column: str, decl: str) -> None:
+    """Add a column to an existing table unless it is already there."""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
 
 
 def init_db() -> None:
     """Initialize the SQLite database and tables if they don't exist."""
     os.makedirs(BASE_DIR, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    # Same PRAGMAs as request connections; journal_mode=WAL persists in the file
+    conn = connect_db()
     try:
         # Pantry items table
         conn.execute(
@@ -49,7 +134,8 @@ def init_db() -> None:
                 emoji TEXT,
                 status TEXT,
                 value REAL,
-                category TEXT
+                category TEXT,
+                expiry_iso TEXT
             )
             """
         )
@@ -73,54 +159,251 @@ def init_db() -> None:
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 item_name TEXT,
                 status TEXT,
-                deleted_at TEXT NOT NULL,
+                deleted_at INTEGER NOT NULL,  -- Unix epoch seconds (UTC)
                 value REAL,
                 category TEXT
             )
             """
         )
 
-        # Basic migration: ensure newer columns exist in older DBs
-        try:
-            conn.execute("ALTER TABLE pantry_items ADD COLUMN value REAL")
-        except sqlite3.OperationalError:
-            pass
+        # Per-day rollup of waste events so the stats endpoints read a handful
+        # of pre-aggregated rows instead of scanning every event.
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS waste_daily_rollup (
+                day TEXT NOT NULL,
+                category TEXT NOT NULL,
+                status TEXT NOT NULL,
+                count INTEGER NOT NULL DEFAULT 0,
+                value_sum REAL NOT NULL DEFAULT 0.0,
+                PRIMARY KEY (day, category, status)
+            )
+            """
+        )
 
-        try:
-            conn.execute("ALTER TABLE pantry_items ADD COLUMN category TEXT")
-        except sqlite3.OperationalError:
-            pass
+        # Indexes for time-range queries on waste events and the pantry list ordering.
+        # users.email needs none: its UNIQUE constraint already creates one.
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_waste_events_deleted_at ON waste_events(deleted_at)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_pantry_items_expiry_date "
+            "ON pantry_items(expiry_date, name)"
+        )
 
-        try:
-            conn.execute("ALTER TABLE waste_events ADD COLUMN value REAL")
-        except sqlite3.OperationalError:
-            pass
+        # Schema migrations, gated on PRAGMA user_version so an up-to-date
+        # database costs a single integer read at startup.
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+
+        if version < 1:
+            # Columns added after the first release
+            _add_column_if_missing(conn, "pantry_items", "value", "REAL")
+            _add_column_if_missing(conn, "pantry_items", "category", "TEXT")
+            _add_column_if_missing(conn, "pantry_items", "expiry_iso", "TEXT")
+            _add_column_if_missing(conn, "waste_events", "value", "REAL")
+            _add_column_if_missing(conn, "waste_events", "category", "TEXT")
+
+            # Backfill the normalized expiry date for rows written before it existed
+            rows = conn.execute(
+                "SELECT id, expiry_date FROM pantry_items "
+                "WHERE expiry_iso IS NULL AND expiry_date IS NOT NULL"
+            ).fetchall()
+            backfill = []
+            for item_id, expiry_date_str in rows:
+                parsed = parse_expiry_date(expiry_date_str)
+                if parsed is not None:
+                    backfill.append((parsed.isoformat(), item_id))
+            if backfill:
+                conn.executemany("UPDATE pantry_items SET expiry_iso = ? WHERE id = ?", backfill)
+
+        if version < 2:
+            # Build the rollup from existing events (unless it was already populated)
+            has_rollup = conn.execute("SELECT 1 FROM waste_daily_rollup LIMIT 1").fetchone()
+            if has_rollup is None:
+                conn.execute(
+                    """
+                    INSERT INTO waste_daily_rollup (day, category, status, count, value_sum)
+                    SELECT DATE(deleted_at),
+                           COALESCE(category, 'Uncategorized'),
+                           COALESCE(status, 'spoiled'),
+                           COUNT(*),
+                           COALESCE(SUM(value), 0.0)
+                    FROM waste_events
+                    WHERE DATE(deleted_at) IS NOT NULL
+                    GROUP BY 1, 2, 3
+                    """
+                )
 
-        try:
-            conn.execute("ALTER TABLE waste_events ADD COLUMN category TEXT")
-        except sqlite3.OperationalError:
-            pass
+        if version < 3:
+            # waste_events.deleted_at moves from ISO TEXT to INTEGER epoch
+            # seconds. A TEXT-affinity column would coerce integers back to
+            # text, so the table is rebuilt with the new declaration.
+            #
+            # Python's sqlite3 does not open a transaction for DDL, so run the
+            # rebuild in an explicit one: a crash part-way must not leave an
+            # orphan waste_events_new behind with user_version still at 2.
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN")
+            try:
+                conn.execute(
+                    """
+                    CREATE TABLE waste_events_new (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        item_name TEXT,
+                        status TEXT,
+                        deleted_at INTEGER NOT NULL,
+                        value REAL,
+                        category TEXT
+                    )
+                    """
+                )
+                conn.execute(
+                    """
+                    INSERT INTO waste_events_new (id, item_name, status, deleted_at, value, category)
+                    SELECT id, item_name, status, epoch, value, category
+                    FROM (
+                        SELECT *,
+                               CASE WHEN typeof(deleted_at) = 'integer' THEN deleted_at
+                                    ELSE CAST(strftime('%s', deleted_at) AS INTEGER)
+                               END AS epoch
+                        FROM waste_events
+                    )
+                    WHERE epoch IS NOT NULL
+                    """
+                )
+                conn.execute("DROP TABLE waste_events")
+                conn.execute("ALTER TABLE waste_events_new RENAME TO waste_events")
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_waste_events_deleted_at ON waste_events(deleted_at)"
+                )
+                conn.execute("PRAGMA user_version = 3")
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+        if version < SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
         conn.commit()
     finally:
         conn.close()
 
 
+def cpu_has_sha_extensions() -> bool | None:
+    """
+    Report whether the CPU advertises SHA-256 instructions (x86 SHA-NI or
+    ARMv8 SHA2). Returns None when this cannot be determined (non-Linux).
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key.strip() in ("flags", "Features"):
+                    flags = value.split()
+                    return "sha_ni" in flags or "sha2" in flags
+    except OSError:
+        return None
+    return None
+
+
+def check_crypto_backend() -> None:
+    """Log which SHA-256 implementation password hashing will run on."""
+
+    if ssl is not None:
+        print(f"Password hashing backend: {ssl.OPENSSL_VERSION}")
+    else:
+        print("Password hashing backend: OpenSSL unavailable")
+    if not HASHLIB_USES_OPENSSL:
+        if CRYPTOGRAPHY_AVAILABLE:
+            print("WARNING: hashlib is not backed by OpenSSL; using cryptography for PBKDF2")
+        elif _hashlib_pbkdf2 is None:
+            print("WARNING: hashlib has no pbkdf2_hmac and cryptography is not installed; "
+                  "PBKDF2 password hashing will fail")
+        else:
+            print("WARNING: hashlib is not backed by OpenSSL and cryptography is not installed; "
+                  "PBKDF2 will be slow")
+
+    sha_ext = cpu_has_sha_extensions()
+    if sha_ext is False:
+        print("WARNING: CPU does not report SHA extensions (sha_ni); SHA-256 runs on the scalar path")
+
+
+def check_cv_backend() -> None:
+    """Enable OpenCV's optimized code paths and log the SIMD levels it was built for."""
+
+    if not CV_AVAILABLE:
+        return
+    cv2.setUseOptimized(True)
+    # Baseline ISA is always used; dispatched levels (e.g. AVX2, AVX512_SKX)
+    # are picked at runtime when the CPU supports them.
+    in_hw_section = False
+    for line in cv2.getBuildInformation().splitlines():
+        if "CPU/HW features" in line:
+            in_hw_section = True
+        elif in_hw_section and line.strip().startswith(("Baseline:", "Dispatched code generation:")):
+            print(f"OpenCV {line.strip()}")
+        elif in_hw_section and not line.startswith("    "):
+            break
+
+
+# Bounded worker pool for CPU-heavy image analysis, created in lifespan.
+_cv_pool: ThreadPoolExecutor | None = None
+
+
+async def run_in_cv_pool(func, *args):
+    """
+    Run a blocking image-analysis call on the CV worker pool so it does not
+    stall the event loop. Falls back to the loop's default executor when the
+    pool has not been created (e.g. outside the app lifespan).
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_cv_pool, func, *args)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan event handler for startup and shutdown."""
+    global _cv_pool
     # Startup
     init_db()
+    check_crypto_backend()
+    check_cv_backend()
+    open_db_pool()
+    _cv_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="cv")
     yield
-    # Shutdown (if needed)
+    # Shutdown
+    _cv_pool.shutdown(wait=True)
+    _cv_pool = None
+    close_db_pool()
 
 
 app = FastAPI(
     title="FreshTrack AI Backend",
     version="0.3.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
+
+@app.middleware("http")
+async def limit_image_upload_size(request: Request, call_next):
+    """
+    Refuse oversized image uploads from their Content-Length, before the
+    multipart form is parsed: Starlette spools the whole body to disk while
+    parsing, which would happen before the route's own size check could run.
+    Registered before CORS so the 413 still carries CORS headers.
+    """
+    if request.url.path in IMAGE_UPLOAD_PATHS:
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_IMAGE_REQUEST_BYTES:
+            return ORJSONResponse({"detail": "Image too large"}, status_code=413)
+    return await call_next(request)
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -225,28 +508,145 @@ class WasteStatsResponse(BaseModel):
     summary: WasteSummary
 
 
+def connect_db() -> sqlite3.Connection:
+    """Open a SQLite connection with Row factory and performance PRAGMAs applied."""
+
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")  # 64 MB page cache
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    return conn
+
+
+_db_pool: queue.Queue | None = None
+
+
+def open_db_pool(size: int = DB_POOL_SIZE) -> None:
+    """Create the process-wide pool of SQLite connections."""
+
+    global _db_pool
+    pool: queue.Queue = queue.Queue(maxsize=size)
+    for _ in range(size):
+        pool.put(connect_db())
+    _db_pool = pool
+
+
+def close_db_pool() -> None:
+    """Close every pooled connection."""
+
+    global _db_pool
+    pool, _db_pool = _db_pool, None
+    if pool is None:
+        return
+    while True:
+        try:
+            pool.get_nowait().close()
+        except queue.Empty:
+            break
+
+
 @contextmanager
 def get_db():
-    """Context manager that yields a SQLite connection with Row factory enabled."""
+    """
+    Context manager that yields a pooled SQLite connection.
 
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    Connections keep their page cache between requests. Outside the app
+    lifespan (e.g. helper scripts) a one-off connection is used instead.
+    """
+
+    pool = _db_pool
+    if pool is None:
+        conn = connect_db()
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+
+    conn = pool.get()
     try:
         yield conn
     finally:
-        conn.close()
+        # Never hand the next request a half-finished transaction
+        if conn.in_transaction:
+            conn.rollback()
+        pool.put(conn)
+
+
+PBKDF2_ITERATIONS = 100_000
+
+# CPython builds linked against OpenSSL expose pbkdf2_hmac from _hashlib; that
+# is the path that picks up SHA-NI. Anything else is a slow fallback build, and
+# since Python 3.12 builds without OpenSSL have no pbkdf2_hmac at all.
+_hashlib_pbkdf2 = getattr(hashlib, "pbkdf2_hmac", None)
+HASHLIB_USES_OPENSSL = _hashlib_pbkdf2 is not None and _hashlib_pbkdf2.__module__ == "_hashlib"
+
+
+def _pbkdf2_sha256(password: str, salt: bytes) -> bytes:
+    """
+    Derive a PBKDF2-HMAC-SHA256 key for the given password and salt.
+
+    hashlib hands this to OpenSSL, which keys the HMAC once and reuses the
+    precomputed ipad/opad digest states for every round. Re-implementing the
+    round loop in Python is several times slower, so keep this as the single
+    entry point used by both hashing and verification.
+    """
+    if not HASHLIB_USES_OPENSSL and CRYPTOGRAPHY_AVAILABLE:
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=salt, iterations=PBKDF2_ITERATIONS)
+        return kdf.derive(password.encode("utf-8"))
+    if _hashlib_pbkdf2 is None:
+        raise RuntimeError(
+            "No PBKDF2 backend: hashlib lacks pbkdf2_hmac (Python built without OpenSSL) "
+            "and cryptography is not installed"
+        )
+    return _hashlib_pbkdf2("sha256", password.encode("utf-8"), salt, PBKDF2_ITERATIONS)
+
+
+PBKDF2_PREFIX = "pbkdf2_sha256$"
+ARGON2_PREFIX = "argon2$"
+
+_argon2_hasher = PasswordHasher() if ARGON2_AVAILABLE else None
 
 
 def hash_password(password: str) -> str:
-    """Hash a password with a random salt using SHA-256."""
+    """
+    Hash a password for storage.
+
+    Hashes are stored under a scheme prefix ("argon2$..." or
+    "pbkdf2_sha256$salt:hash") so verify_password can dispatch on it.
+    """
+
+    if PASSWORD_HASHER == "argon2" and _argon2_hasher is not None:
+        return ARGON2_PREFIX + _argon2_hasher.hash(password)
 
     salt = secrets.token_bytes(16)
-    dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 100_000)
-    return binascii.hexlify(salt).decode("ascii") + ":" + binascii.hexlify(dk).decode("ascii")
+    dk = _pbkdf2_sha256(password, salt)
+    return (
+        PBKDF2_PREFIX
+        + binascii.hexlify(salt).decode("ascii")
+        + ":"
+        + binascii.hexlify(dk).decode("ascii")
+    )
 
 
 def verify_password(password: str, stored_hash: str) -> bool:
-    """Verify a password against the stored salt:hash string."""
+    """Verify a password against a stored hash produced by hash_password."""
+
+    if stored_hash.startswith(ARGON2_PREFIX):
+        if _argon2_hasher is None:
+            print("argon2 password hash found but argon2-cffi is not installed")
+            return False
+        try:
+            return _argon2_hasher.verify(stored_hash[len(ARGON2_PREFIX):], password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    # Un-prefixed values are legacy salt:hash PBKDF2 hashes.
+    if stored_hash.startswith(PBKDF2_PREFIX):
+        stored_hash = stored_hash[len(PBKDF2_PREFIX):]
 
     try:
         salt_hex, hash_hex = stored_hash.split(":", 1)
@@ -255,73 +655,151 @@ def verify_password(password: str, stored_hash: str) -> bool:
     except Exception:
         return False
 
-    dk = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, 100_000)
+    dk = _pbkdf2_sha256(password, salt)
     return secrets.compare_digest(dk, expected_hash)
 
 
+_ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+_SLASH_DATE_RE = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$")
+_MONTH_NAME_DATE_RE = re.compile(r"^[A-Za-z]{3} \d{1,2}, \d{4}$")
+
+
+def parse_expiry_date(expiry_date_str: str | None) -> date | None:
+    """
+    Parse an expiry date in any of the formats the app accepts.
+    Returns None if the string is empty or cannot be parsed.
+
+    The format is classified with a regex up front so each value goes
+    through exactly one parser instead of a chain of failing ones.
+    """
+    if not expiry_date_str:
+        return None
+
+    # ISO format, e.g. "2025-11-30" or "2025-11-30T00:00:00Z"
+    if _ISO_DATE_RE.match(expiry_date_str):
+        try:
+            return datetime.fromisoformat(expiry_date_str.replace('Z', '+00:00')).date()
+        except ValueError:
+            return None
+
+    # "30/11/2025" (day first) or "11/30/2025" (month first)
+    match = _SLASH_DATE_RE.match(expiry_date_str)
+    if match:
+        first, second, year = (int(part) for part in match.groups())
+        for month, day in ((second, first), (first, second)):
+            try:
+                return date(year, month, day)
+            except ValueError:
+                continue
+        return None
+
+    # "Nov 30, 2025"
+    if _MONTH_NAME_DATE_RE.match(expiry_date_str):
+        try:
+            return datetime.strptime(expiry_date_str, "%b %d, %Y").date()
+        except ValueError:
+            return None
+
+    # Any other ISO variant fromisoformat understands (e.g. "20251130")
+    try:
+        return datetime.fromisoformat(expiry_date_str.replace('Z', '+00:00')).date()
+    except ValueError:
+        return None
+
+
 def calculate_expiry_status(expiry_date_str: str | None) -> str:
     """
     Calculate the expiry status based on the expiry date.
     Returns: 'fresh', 'expiring', or 'expired'
     """
-    if not expiry_date_str:
-        return 'fresh'  # Default if no date provided
+    expiry_date = parse_expiry_date(expiry_date_str)
+    if expiry_date is None:
+        return 'fresh'  # Default if no date provided or parsing fails
     
-    try:
-        # Try parsing various date formats
-        expiry_date = None
-        
-        # Try ISO format first
-        try:
-            expiry_date = datetime.fromisoformat(expiry_date_str.replace('Z', '+00:00'))
-        except:
-            pass
-        
-        # Try common formats like "Nov 30, 2025" or "30/11/2025"
-        if expiry_date is None:
-            try:
-                expiry_date = datetime.strptime(expiry_date_str, "%b %d, %Y")
-            except:
-                try:
-                    expiry_date = datetime.strptime(expiry_date_str, "%d/%m/%Y")
-                except:
-                    try:
-                        expiry_date = datetime.strptime(expiry_date_str, "%m/%d/%Y")
-                    except:
-                        pass
-        
-        if expiry_date is None:
-            return 'fresh'  # Default if parsing fails
-        
-        # Normalize to date only (remove time)
-        expiry_date = expiry_date.date()
-        today = datetime.utcnow().date()
-        
-        # Calculate days until expiry
-        days_until_expiry = (expiry_date - today).days
-        
-        if days_until_expiry < 0:
-            return 'expired'
-        elif days_until_expiry <= 3:  # Expiring within 3 days
-            return 'expiring'
-        else:
-            return 'fresh'
-            
-    except Exception:
-        return 'fresh'  # Default on any error
+    today = datetime.utcnow().date()
+    
+    # Calculate days until expiry
+    days_until_expiry = (expiry_date - today).days
+    
+    if days_until_expiry < 0:
+        return 'expired'
+    elif days_until_expiry <= 3:  # Expiring within 3 days
+        return 'expiring'
+    else:
+        return 'fresh'
+
+
+# SQL twin of calculate_expiry_status, evaluated against the normalized
+# expiry_iso column so the pantry list can refresh every status in one UPDATE.
+EXPIRY_STATUS_SQL = """
+    CASE
+        WHEN expiry_iso IS NULL THEN 'fresh'
+        WHEN julianday(expiry_iso) < julianday('now', 'start of day') THEN 'expired'
+        WHEN julianday(expiry_iso) - julianday('now', 'start of day') <= 3 THEN 'expiring'
+        ELSE 'fresh'
+    END
+"""
+
+
+_gemini_model = None
 
 
 def get_gemini_model():
+    global _gemini_model
     if genai is None:
         raise RuntimeError("google-generativeai is not installed")
     if not GEMINI_API_KEY:
         raise RuntimeError("GEMINI_API_KEY is not set in environment")
 
-    genai.configure(api_key=GEMINI_API_KEY)
-    # Use Gemini 2.5 Flash as requested.
-    # If this model is not available on the current account, the /ai/recipes
-    # endpoint will gracefully fall back to local recipe generation.
-    return genai.GenerativeModel("gemini-2.5-flash")
+    if _gemini_model is None:
+        # Configure once: genai.configure() drops the SDK's cached clients, and
+        # with them the persistent gRPC (HTTP/2) channels that let concurrent
+        # calls share one TLS connection instead of handshaking per request.
+        genai.configure(api_key=GEMINI_API_KEY)
+        # Use Gemini 2.5 Flash as requested.
+        # If this model is not available on the current account, the /ai/recipes
+        # endpoint will gracefully fall back to local recipe generation.
+        _gemini_model = genai.GenerativeModel("gemini-2.5-flash")
+    return _gemini_model
+
+
+# Outermost {...} span of a model reply, ignoring code fences or chatter around it
+JSON_OBJECT_RE = re.compile(rb"\{.*\}", re.DOTALL)
+
+
+def _parse_json_object(text: str):
+    """Extract and parse the JSON object embedded in a Gemini text reply."""
+    match = JSON_OBJECT_RE.search(text.encode())
+    if match is None:
+        raise ValueError("Gemini response contains no JSON object")
+    return orjson.loads(match.group(0))
+
+
+def _cache_get(cache: OrderedDict, key, ttl_seconds: float):
+    """Return a live cached value (refreshing its LRU position) or None."""
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    stored_at, value = entry
+    if time.monotonic() - stored_at > ttl_seconds:
+        del cache[key]
+        return None
+    cache.move_to_end(key)
+    return value
+
+
+def _cache_put(cache: OrderedDict, key, value, max_entries: int) -> None:
+    """Store a value, evicting the least recently used entries past max_entries."""
+    cache[key] = (time.monotonic(), value)
+    cache.move_to_end(key)
+    while len(cache) > max_entries:
+        cache.popitem(last=False)
+
+
+# Gemini recipe responses keyed by the pantry contents that produced them
+_recipe_cache: OrderedDict = OrderedDict()
+# Gemini food recognitions keyed by a digest of the uploaded image bytes
+_recognition_cache: OrderedDict = OrderedDict()
 
 
 def generate_local_recipes(pantry_items: list[PantryItem]) -> RecipeResponse:
@@ -332,13 +810,22 @@ def generate_local_recipes(pantry_items: list[PantryItem]) -> RecipeResponse:
     """
 
     # Simple heuristic: pick a few item names and build recipes around them.
-    names = [item.name for item in pantry_items if item.name]
-    unique_names = list(dict.fromkeys(names))  # preserve order, remove duplicates
+    # Only the first 5 distinct names are ever used, so stop collecting there.
+    unique_names: list[str] = []
+    seen: set[str] = set()
+    for item in pantry_items:
+        name = item.name
+        if not name or name in seen:
+            continue
+        seen.add(name)
+        unique_names.append(name)
+        if len(unique_names) >= 5:
+            break
 
     if not unique_names:
         unique_names = ["Pantry Mix"]
 
-    base_ingredients = [n.lower() for n in unique_names[:5]]
+    base_ingredients = [n.lower() for n in unique_names]
 
     recipes: list[Recipe] = []
 
@@ -459,51 +946,53 @@ async def login(credentials: UserLogin):
 
 
 @app.get("/pantry/items", response_model=List[PantryItemOut])
-async def list_pantry_items():
-    """Return all pantry items stored in SQLite with automatically calculated expiry status."""
+async def list_pantry_items(request: Request, response: Response):
+    """
+    Return all pantry items stored in SQLite with automatically calculated expiry status.
+
+    Responses carry a weak ETag so polling clients get a 304 while nothing changed.
+    """
 
     with get_db() as conn:
+        # Items are only ever inserted (AUTOINCREMENT ids) or deleted, so the
+        # highest id plus the row count identifies the set. Statuses roll over
+        # with the calendar day, so the day is part of the tag as well.
+        max_id, item_count = conn.execute(
+            "SELECT COALESCE(MAX(id), 0), COUNT(*) FROM pantry_items"
+        ).fetchone()
+        etag = f'W/"{max_id}-{item_count}-{datetime.utcnow().date().isoformat()}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+
+        # Refresh every drifted status in a single statement; `with conn`
+        # commits it as one transaction (or rolls back on error).
+        with conn:
+            conn.execute(
+                f"UPDATE pantry_items SET status = {EXPIRY_STATUS_SQL} "
+                f"WHERE status IS NOT {EXPIRY_STATUS_SQL}"
+            )
+
         cur = conn.execute(
             "SELECT id, name, quantity, expiry_date, emoji, status, value, category "
             "FROM pantry_items ORDER BY expiry_date ASC, name ASC"
         )
         rows = cur.fetchall()
 
-        items = []
-        updates_needed = []
-        
-        for row in rows:
-            # Calculate status based on expiry_date if not already set or needs update
-            calculated_status = calculate_expiry_status(row["expiry_date"])
-            # Use calculated status (always recalculate to ensure accuracy)
-            status = calculated_status
-            
-            # Track if update is needed
-            if row["status"] != calculated_status:
-                updates_needed.append((calculated_status, row["id"]))
-            
-            items.append(
-                PantryItemOut(
-                    id=row["id"],
-                    name=row["name"],
-                    quantity=row["quantity"],
-                    expiry_date=row["expiry_date"],
-                    emoji=row["emoji"],
-                    status=status,
-                    value=row["value"],
-                    category=row["category"],
-                )
-            )
-        
-        # Update statuses if needed (all within the same connection context)
-        if updates_needed:
-            for calculated_status, item_id in updates_needed:
-                conn.execute(
-                    "UPDATE pantry_items SET status = ? WHERE id = ?",
-                    (calculated_status, item_id)
-                )
-            conn.commit()
-    
+    items = [
+        PantryItemOut(
+            id=row["id"],
+            name=row["name"],
+            quantity=row["quantity"],
+            expiry_date=row["expiry_date"],
+            emoji=row["emoji"],
+            status=row["status"],
+            value=row["value"],
+            category=row["category"],
+        )
+        for row in rows
+    ]
+
+    response.headers["ETag"] = etag
     return items
 
 
@@ -515,12 +1004,16 @@ async def create_pantry_item(item: PantryItemIn):
     calculated_status = calculate_expiry_status(item.expiry_date)
     # Use calculated status instead of provided status
     final_status = calculated_status
+    # Store a normalized copy of the date for SQL-side status refreshes
+    parsed_expiry = parse_expiry_date(item.expiry_date)
+    expiry_iso = parsed_expiry.isoformat() if parsed_expiry else None
 
     with get_db() as conn:
         cur = conn.execute(
             """
-            INSERT INTO pantry_items (name, quantity, expiry_date, emoji, status, value, category)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            INSERT INTO pantry_items
+                (name, quantity, expiry_date, emoji, status, value, category, expiry_iso)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
             """,
             (
                 item.name,
@@ -530,6 +1023,7 @@ async def create_pantry_item(item: PantryItemIn):
                 final_status,
                 item.value,
                 item.category,
+                expiry_iso,
             ),
         )
         conn.commit()
@@ -573,8 +1067,8 @@ async def delete_pantry_item(item_id: int):
 
         conn.execute("DELETE FROM pantry_items WHERE id = ?", (item_id,))
 
-        # Record a waste/savings event for statistics.
-        deleted_at = datetime.utcnow().isoformat(timespec="seconds")
+        # Record a waste/savings event for statistics (epoch seconds, UTC).
+        deleted_at = int(time.time())
 
         # Heuristic:
         # - If the item was still fresh/expiring when removed, treat as "eaten" (saved).
@@ -595,6 +1089,16 @@ async def delete_pantry_item(item_id: int):
             """,
             (row["name"], outcome_status, deleted_at, value, category),
         )
+        conn.execute(
+            """
+            INSERT INTO waste_daily_rollup (day, category, status, count, value_sum)
+            VALUES (DATE(?, 'unixepoch'), COALESCE(?, 'Uncategorized'), ?, 1, COALESCE(?, 0.0))
+            ON CONFLICT (day, category, status) DO UPDATE SET
+                count = count + 1,
+                value_sum = value_sum + excluded.value_sum
+            """,
+            (deleted_at, category, outcome_status, value),
+        )
 
         conn.commit()
 
@@ -626,31 +1130,49 @@ async def get_enhanced_waste_stats():
         # Per-day counts for trend
         cur = conn.execute(
             """
-            SELECT DATE(deleted_at) AS d, COUNT(*) AS c
-            FROM waste_events
-            WHERE DATE(deleted_at) >= ?
-            GROUP BY DATE(deleted_at)
+            SELECT day AS d, SUM(count) AS c
+            FROM waste_daily_rollup
+            WHERE day >= ? AND day <= ?
+            GROUP BY day
             """,
-            (start_date.isoformat(),),
+            (start_date.isoformat(), today.isoformat()),
         )
         rows = cur.fetchall()
 
-        # Total number of waste/savings events
-        cur_total = conn.execute("SELECT COUNT(*) FROM waste_events")
-        total_events = cur_total.fetchone()[0]
-
-        # Monetary totals
-        cur_value = conn.execute(
+        # Total number of waste/savings events and monetary totals
+        cur_totals = conn.execute(
             """
             SELECT
-              COALESCE(SUM(CASE WHEN status = 'eaten' THEN value END), 0.0) AS saved_value,
-              COALESCE(SUM(CASE WHEN status != 'eaten' THEN value END), 0.0) AS wasted_value
-            FROM waste_events
+              COALESCE(SUM(count), 0) AS total_events,
+              COALESCE(SUM(CASE WHEN status = 'eaten' THEN value_sum END), 0.0) AS saved_value,
+              COALESCE(SUM(CASE WHEN status != 'eaten' THEN value_sum END), 0.0) AS wasted_value
+            FROM waste_daily_rollup
             """
         )
-        row_val = cur_value.fetchone()
-        saved_value = float(row_val[0] or 0.0)
-        wasted_value = float(row_val[1] or 0.0)
+        row_totals = cur_totals.fetchone()
+        total_events = row_totals["total_events"]
+        saved_value = float(row_totals["saved_value"] or 0.0)
+        wasted_value = float(row_totals["wasted_value"] or 0.0)
+
+        # Category breakdown
+        try:
+            cur_category = conn.execute(
+                """
+                SELECT
+                  category AS cat,
+                  SUM(CASE WHEN status = 'eaten' THEN count ELSE 0 END) AS saved_count,
+                  SUM(CASE WHEN status != 'eaten' THEN count ELSE 0 END) AS wasted_count,
+                  SUM(CASE WHEN status = 'eaten' THEN value_sum ELSE 0 END) AS saved_val,
+                  SUM(CASE WHEN status != 'eaten' THEN value_sum ELSE 0 END) AS wasted_val
+                FROM waste_daily_rollup
+                GROUP BY cat
+                ORDER BY wasted_count DESC
+                """
+            )
+            category_rows = cur_category.fetchall()
+        except Exception as e:
+            print(f"Error getting category breakdown: {e}")
+            category_rows = []
 
     # Map date string -> count
     counts_by_date: dict[str, int] = {
@@ -704,36 +1226,16 @@ async def get_enhanced_waste_stats():
         wasted_value_formatted=fmt_currency(wasted_value),
     )
 
-    # Category breakdown
-    try:
-        cur_category = conn.execute(
-            """
-            SELECT 
-              COALESCE(category, 'Uncategorized') AS cat,
-              SUM(CASE WHEN status = 'eaten' THEN 1 ELSE 0 END) AS saved_count,
-              SUM(CASE WHEN status != 'eaten' THEN 1 ELSE 0 END) AS wasted_count,
-              SUM(CASE WHEN status = 'eaten' THEN COALESCE(value, 0) ELSE 0 END) AS saved_val,
-              SUM(CASE WHEN status != 'eaten' THEN COALESCE(value, 0) ELSE 0 END) AS wasted_val
-            FROM waste_events
-            GROUP BY cat
-            ORDER BY wasted_count DESC
-            """
+    category_breakdown = [
+        CategoryWaste(
+            category=row["cat"] or "Uncategorized",
+            saved_count=row["saved_count"] or 0,
+            wasted_count=row["wasted_count"] or 0,
+            saved_value=float(row["saved_val"] or 0.0),
+            wasted_value=float(row["wasted_val"] or 0.0),
         )
-        category_rows = cur_category.fetchall()
-        
-        category_breakdown = [
-            CategoryWaste(
-                category=row["cat"] or "Uncategorized",
-                saved_count=row["saved_count"] or 0,
-                wasted_count=row["wasted_count"] or 0,
-                saved_value=float(row["saved_val"] or 0.0),
-                wasted_value=float(row["wasted_val"] or 0.0),
-            )
-            for row in category_rows
-        ]
-    except Exception as e:
-        print(f"Error getting category breakdown: {e}")
-        category_breakdown = []
+        for row in category_rows
+    ]
 
     return EnhancedWasteStatsResponse(
         trend=trend,
@@ -754,18 +1256,28 @@ async def ai_recipes(payload: RecipeRequest):
     if genai is None or not GEMINI_API_KEY:
         return generate_local_recipes(payload.pantry_items)
 
+    # Same pantry contents -> same prompt, so reuse the earlier Gemini answer
+    cache_key = tuple(sorted(
+        (item.name, item.quantity or "", item.expiry_date or "")
+        for item in payload.pantry_items
+    ))
+    cached = _cache_get(_recipe_cache, cache_key, RECIPE_CACHE_TTL_SECONDS)
+    if cached is not None:
+        return cached
+
     try:
         model = get_gemini_model()
     except RuntimeError as e:
         # As an extra safety, fall back to local generation if Gemini fails
         return generate_local_recipes(payload.pantry_items)
 
-    items_text = "\n".join(
-        f"- {item.name}"
-        + (f" (qty: {item.quantity})" if item.quantity else "")
-        + (f", expiring: {item.expiry_date}" if item.expiry_date else "")
-        for item in payload.pantry_items
-    )
+    # One f-string per item and a single join, instead of chained `+` concatenation
+    item_lines = []
+    for item in payload.pantry_items:
+        qty = f" (qty: {item.quantity})" if item.quantity else ""
+        expiry = f", expiring: {item.expiry_date}" if item.expiry_date else ""
+        item_lines.append(f"- {item.name}{qty}{expiry}")
+    items_text = "\n".join(item_lines)
 
     prompt = f"""
 You are an assistant for a food-waste tracking app called FreshTrack.
@@ -790,8 +1302,20 @@ Do NOT include any extra text outside of the JSON. Do not use backticks.
 """
 
     try:
-        response = model.generate_content(prompt)
-        text = response.text.strip()
+        # Stream the answer and stop reading as soon as the buffered text
+        # parses as a complete JSON document; nothing useful follows it.
+        response = model.generate_content(prompt, stream=True)
+        chunks: list[str] = []
+        data = None
+        for chunk in response:
+            chunks.append(chunk.text)
+            if chunk.text.rstrip().endswith("}"):
+                try:
+                    data = orjson.loads("".join(chunks))
+                    break
+                except orjson.JSONDecodeError:
+                    continue
+        text = "".join(chunks).strip()
     except Exception as e:
         # If Gemini fails for any reason (model not found, quota, network, etc.),
         # log the error and fall back to local recipe generation instead of
@@ -800,10 +1324,9 @@ Do NOT include any extra text outside of the JSON. Do not use backticks.
         print(f"Gemini error in /ai/recipes, falling back to local recipes: {e}")
         return generate_local_recipes(payload.pantry_items)
 
-    import json
-
     try:
-        data = json.loads(text)
+        if data is None:
+            data = _parse_json_object(text)
 
         # Basic structural validation
         if "recipes" not in data or not isinstance(data["recipes"], list):
@@ -826,7 +1349,10 @@ Do NOT include any extra text outside of the JSON. Do not use backticks.
         if not recipes:
             raise ValueError("No valid recipes generated from Gemini response")
 
-        return RecipeResponse(recipes=recipes)
+        result = RecipeResponse(recipes=recipes)
+        # Only real Gemini answers are cached; fallbacks should retry Gemini next time
+        _cache_put(_recipe_cache, cache_key, result, RECIPE_CACHE_MAX_ENTRIES)
+        return result
 
     except Exception as e:
         # Any parsing/validation issue from Gemini should not break the app;
@@ -851,7 +1377,88 @@ class FoodRecognitionResponse(BaseModel):
     estimated_expiry_days: int | None  # Estimated days until expiry based on food type
 
 
-def analyze_freshness(image_bytes: bytes) -> FreshnessResponse:
+if NUMBA_AVAILABLE and CV_AVAILABLE:
+    # Fixed-point reciprocals (255 << 12) / v, the same table OpenCV's
+    # BGR2HSV uses, so saturation needs no per-pixel division
+    _SDIV_TABLE = np.array(
+        [0] + [round((255 << 12) / v) for v in range(1, 256)], dtype=np.int32
+    )
+
+    # Deliberately not parallel=True: images are already downscaled to
+    # FRESHNESS_MAX_DIM and requests run concurrently on the CV pool, so a
+    # nested thread team only adds launch overhead and oversubscribes cores.
+    # The explicit signature (C-contiguous uint8 HxWxC) compiles eagerly at
+    # import, or loads from the on-disk cache, so the first /ai/freshness
+    # request pays no JIT latency and calls skip type dispatch. nogil lets
+    # concurrent requests on the CV pool run the loop on separate cores.
+    @njit(
+        "UniTuple(i8, 3)(u1[:, :, ::1])",
+        cache=True, boundscheck=False, nogil=True,
+    )
+    def _freshness_kernel(bgr):
+        """
+        Sum of saturation, sum of squared saturation and sum of value over a
+        BGR image in a single pass. HSV S and V are computed inline exactly as
+        cv2.COLOR_BGR2HSV does, so no intermediate HSV image is built.
+
+        The inner loop is branch-free integer math (max/min plus a table
+        lookup) with exact 64-bit integer sums, which lets LLVM vectorize it
+        across pixels; the caller divides once at the end.
+        """
+        s_sum = np.int64(0)
+        s_sq_sum = np.int64(0)
+        v_sum = np.int64(0)
+        for y in range(bgr.shape[0]):
+            for x in range(bgr.shape[1]):
+                b = np.int32(bgr[y, x, 0])
+                g = np.int32(bgr[y, x, 1])
+                r = np.int32(bgr[y, x, 2])
+                v = max(b, g, r)
+                # _SDIV_TABLE[0] is 0, so black pixels get s == 0 without a branch
+                s = ((v - min(b, g, r)) * _SDIV_TABLE[v] + (1 << 11)) >> 12
+                s_sum += s
+                s_sq_sum += s * s
+                v_sum += v
+        return s_sum, s_sq_sum, v_sum
+
+
+def _decode_image(image_bytes: bytes | bytearray):
+    """
+    Decode an uploaded image into a uint8 pixel array, or None if undecodable.
+
+    JPEGs go through libturbojpeg straight to 4-byte BGRX pixels when it is
+    available (channel order matches OpenCV's BGR, plus a padding byte);
+    everything else is decoded by OpenCV into 3-channel BGR. The turbojpeg
+    path ignores EXIF orientation, which is fine for the orientation-agnostic
+    freshness statistics this is used for.
+    """
+    if TURBOJPEG_AVAILABLE and image_bytes[:2] == b"\xff\xd8":
+        try:
+            return _turbojpeg.decode(image_bytes, pixel_format=TJPF_BGRX)
+        except OSError:
+            pass  # Let OpenCV have a go at anything libjpeg-turbo rejects
+    return cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+
+
+def _downscale(img, max_dim: int):
+    """Shrink an image so its long edge is at most max_dim pixels (never upscales)."""
+    height, width = img.shape[:2]
+    scale = max_dim / max(height, width)
+    if scale < 1:
+        img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return img
+
+
+def _prepare_for_vision_api(img) -> bytes:
+    """Downscale a decoded image and encode it as a compact JPEG for Gemini."""
+    img = _downscale(img, VISION_MAX_DIM)
+    ok, encoded = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, VISION_JPEG_QUALITY])
+    if not ok:
+        raise ValueError("Could not encode image for the vision API")
+    return encoded.tobytes()
+
+
+def analyze_freshness(image_bytes: bytes | bytearray) -> FreshnessResponse:
     """
     Analyze food freshness from an image using OpenCV and basic computer vision.
     
@@ -864,7 +1471,7 @@ def analyze_freshness(image_bytes: bytes) -> FreshnessResponse:
     """
     if not CV_AVAILABLE:
         # Fallback if OpenCV is not installed
-        return FreshnessResponse(
+        return FreshnessResponse.model_construct(
             freshness_score=75.0,
             freshness_label="Fresh",
             confidence=0.5,
@@ -872,39 +1479,54 @@ def analyze_freshness(image_bytes: bytes) -> FreshnessResponse:
         )
     
     try:
-        # Load image from bytes
-        image = Image.open(io.BytesIO(image_bytes))
-        # Convert to RGB if needed
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        # Convert PIL to numpy array
-        img_array = np.array(image)
-        # Convert RGB to BGR for OpenCV
-        img_bgr = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
+        # Decode straight to a BGR (or BGRX) array (no PIL/RGB round-trip)
+        img_bgr = _decode_image(image_bytes)
+        if img_bgr is None:
+            raise ValueError("Could not decode image")
+        
+        # Phone photos are several megapixels; the statistics below converge
+        # long before that, so shrink to FRESHNESS_MAX_DIM on the long edge.
+        img_bgr = _downscale(img_bgr, FRESHNESS_MAX_DIM)
         
-        # Convert to HSV for better color analysis
-        hsv = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV)
+        has_padding = img_bgr.shape[2] == 4
         
-        # Extract color channels
-        h, s, v = cv2.split(hsv)
+        if NUMBA_AVAILABLE:
+            # Saturation mean/variance and brightness mean from one fused pass
+            # over the BGR(X) pixels (HSV computed on the fly; X is ignored)
+            # No-op for decoder/resize output; the kernel only accepts C order
+            s_sum, s_sq_sum, v_sum = _freshness_kernel(np.ascontiguousarray(img_bgr))
+            pixel_count = img_bgr.shape[0] * img_bgr.shape[1]
+            avg_saturation = s_sum / pixel_count
+            saturation_variance = max(s_sq_sum / pixel_count - avg_saturation * avg_saturation, 0.0)
+            avg_brightness = v_sum / pixel_count
+        else:
+            # Convert to HSV for better color analysis
+            if has_padding:
+                img_bgr = cv2.cvtColor(img_bgr, cv2.COLOR_BGRA2BGR)
+                has_padding = False
+            hsv = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV)
+            # Mean and std-dev of H, S and V in a single SIMD pass over the uint8
+            # buffer. Unpack to plain Python floats once: everything after this is
+            # scalar math, where NumPy scalars only add overhead.
+            means, stds = cv2.meanStdDev(hsv)
+            _, avg_saturation, avg_brightness = means.ravel().tolist()
+            _, saturation_std, _ = stds.ravel().tolist()
+            saturation_variance = saturation_std * saturation_std
         
         # Calculate metrics
         # 1. Average saturation (higher = more vibrant/fresh)
-        avg_saturation = np.mean(s)
         saturation_score = min(avg_saturation / 128.0, 1.0) * 40  # Max 40 points
         
         # 2. Variance in saturation (low variance might indicate uniform discoloration)
-        saturation_variance = np.var(s)
         variance_score = min(saturation_variance / 5000.0, 1.0) * 20  # Max 20 points
         
         # 3. Average brightness (very dark might indicate spoilage)
-        avg_brightness = np.mean(v)
         brightness_score = min(avg_brightness / 200.0, 1.0) * 20  # Max 20 points
         
         # 4. Edge detection for texture (more edges = more texture = likely fresher)
-        gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+        gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGRA2GRAY if has_padding else cv2.COLOR_BGR2GRAY)
         edges = cv2.Canny(gray, 50, 150)
-        edge_density = np.sum(edges > 0) / (edges.shape[0] * edges.shape[1])
+        edge_density = cv2.countNonZero(edges) / (edges.shape[0] * edges.shape[1])
         texture_score = min(edge_density * 10, 1.0) * 20  # Max 20 points
         
         # Combine scores (0-100)
@@ -930,11 +1552,13 @@ def analyze_freshness(image_bytes: bytes) -> FreshnessResponse:
             "variance_score": round(variance_score, 2),
             "brightness_score": round(brightness_score, 2),
             "texture_score": round(texture_score, 2),
-            "avg_saturation": round(float(avg_saturation), 2),
-            "avg_brightness": round(float(avg_brightness), 2),
+            "avg_saturation": round(avg_saturation, 2),
+            "avg_brightness": round(avg_brightness, 2),
         }
         
-        return FreshnessResponse(
+        # Every field is computed here with the right type, so skip pydantic
+        # validation; only the Gemini-derived recognition response needs it
+        return FreshnessResponse.model_construct(
             freshness_score=round(freshness_score, 1),
             freshness_label=freshness_label,
             confidence=round(confidence, 2),
@@ -944,7 +1568,7 @@ def analyze_freshness(image_bytes: bytes) -> FreshnessResponse:
     except Exception as e:
         # If analysis fails, return a conservative estimate
         print(f"Error analyzing freshness: {e}")
-        return FreshnessResponse(
+        return FreshnessResponse.model_construct(
             freshness_score=50.0,
             freshness_label="Fresh",
             confidence=0.3,
@@ -952,6 +1576,42 @@ def analyze_freshness(image_bytes: bytes) -> FreshnessResponse:
         )
 
 
+async def _read_upload(file: UploadFile) -> bytearray:
+    """
+    Read an upload into a single buffer. When the size is known the buffer is
+    allocated once and filled in place with readinto(); otherwise chunks are
+    appended as they arrive.
+
+    Uploads over MAX_IMAGE_BYTES raise a 413. By this point Starlette has
+    already received and spooled the part (UploadFile.size is the spooled byte
+    count), so this only keeps oversized files out of memory and away from the
+    decoders; limit_image_upload_size refuses them earlier from Content-Length
+    when the client sends one.
+    """
+    too_large = HTTPException(status_code=413, detail="Image too large")
+    if file.size is not None:
+        if file.size > MAX_IMAGE_BYTES:
+            raise too_large
+        buf = bytearray(file.size)
+        view = memoryview(buf)
+        offset = 0
+        while offset < file.size:
+            n = await run_in_threadpool(file.file.readinto, view[offset:])
+            if not n:
+                break
+            offset += n
+        del view  # Release the export so the bytearray can be resized
+        del buf[offset:]
+        return buf
+
+    buf = bytearray()
+    while chunk := await file.read(UPLOAD_READ_CHUNK_BYTES):
+        buf += chunk
+        if len(buf) > MAX_IMAGE_BYTES:
+            raise too_large
+    return buf
+
+
 @app.post("/ai/freshness", response_model=FreshnessResponse)
 async def analyze_food_freshness(file: UploadFile = File(...)):
     """
@@ -963,7 +1623,7 @@ async def analyze_food_freshness(file: UploadFile = File(...)):
     if not CV_AVAILABLE:
         raise HTTPException(
             status_code=503,
-            detail="Image analysis not available. Please install opencv-python and numpy."
+            detail="Image analysis not available. Please install opencv-python-headless and numpy."
         )
     
     # Validate file type
@@ -972,13 +1632,13 @@ async def analyze_food_freshness(file: UploadFile = File(...)):
     
     try:
         # Read image bytes
-        image_bytes = await file.read()
+        image_bytes = await _read_upload(file)
         
         if len(image_bytes) == 0:
             raise HTTPException(status_code=400, detail="Empty image file")
         
-        # Analyze freshness
-        result = analyze_freshness(image_bytes)
+        # Analyze freshness off the event loop
+        result = await run_in_cv_pool(analyze_freshness, image_bytes)
         return result
         
     except HTTPException:
@@ -987,26 +1647,51 @@ async def analyze_food_freshness(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Failed to analyze image: {str(e)}")
 
 
-def recognize_food_item(image_bytes: bytes) -> FoodRecognitionResponse:
+def _prepare_recognition_payload(image_bytes: bytes | bytearray) -> bytes | bytearray:
+    """
+    Gemini does not need the client's original photo; a downscaled,
+    quality-70 JPEG shrinks the upload and the model's tokenization work.
+    Anything OpenCV cannot decode is forwarded as-is.
+
+    Decoded with cv2.imdecode rather than _decode_image: the re-encoded JPEG
+    carries no EXIF, so the Orientation tag must be applied here (libjpeg-turbo
+    ignores it) or portrait photos reach Gemini rotated.
+    """
+    if CV_AVAILABLE:
+        img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+        if img is not None:
+            return _prepare_for_vision_api(img)
+    return image_bytes
+
+
+async def recognize_food_item(image_bytes: bytes | bytearray) -> FoodRecognitionResponse:
     """
     Recognize food item from an image using Gemini AI.
     This replaces barcode scanning by using AI to identify food items.
     """
     if genai is None or not GEMINI_API_KEY:
         # Fallback: return generic response
-        return FoodRecognitionResponse(
+        return FoodRecognitionResponse.model_construct(
             name="Food Item",
             confidence=0.3,
             suggestions=["Vegetable", "Fruit", "Dairy", "Meat", "Grain"],
             estimated_expiry_days=None
         )
     
+    # The same photo uploaded again gets the same answer without a Gemini call
+    cache_key = hashlib.blake2b(image_bytes, digest_size=16).digest()
+    cached = _cache_get(_recognition_cache, cache_key, RECOGNITION_CACHE_TTL_SECONDS)
+    if cached is not None:
+        return cached.model_copy(deep=True)
+    
     try:
         model = get_gemini_model()
         
+        # Only the OpenCV preprocessing is CPU-bound; run it on the CV pool
+        image_payload = await run_in_cv_pool(_prepare_recognition_payload, image_bytes)
+        
         # Convert image bytes to base64 for Gemini
-        import base64
-        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+        image_base64 = base64.b64encode(image_payload).decode('ascii')
         
         prompt = """
         Look at this image of a food item and identify what it is.
@@ -1021,8 +1706,9 @@ def recognize_food_item(image_bytes: bytes) -> FoodRecognitionResponse:
         Be specific with the name. Use common food names. Do not include any other text.
         """
         
-        # Use Gemini's vision capabilities
-        response = model.generate_content([
+        # Use Gemini's vision capabilities; the async client lets concurrent
+        # requests overlap on network latency instead of each holding a thread
+        response = await model.generate_content_async([
             prompt,
             {
                 "mime_type": "image/jpeg",
@@ -1030,30 +1716,22 @@ def recognize_food_item(image_bytes: bytes) -> FoodRecognitionResponse:
             }
         ])
         
-        import json
-        text = response.text.strip()
-        
-        # Try to extract JSON from response
-        # Remove markdown code blocks if present
-        if text.startswith("```"):
-            text = text.split("```")[1]
-            if text.startswith("json"):
-                text = text[4:]
-        text = text.strip()
-        
-        data = json.loads(text)
+        data = _parse_json_object(response.text)
         
-        return FoodRecognitionResponse(
+        result = FoodRecognitionResponse(
             name=data.get("name", "Food Item"),
             confidence=float(data.get("confidence", 0.5)),
             suggestions=data.get("suggestions", []),
             estimated_expiry_days=data.get("estimated_expiry_days")
         )
+        # Only real Gemini answers are cached; fallbacks should retry Gemini next time
+        _cache_put(_recognition_cache, cache_key, result, RECOGNITION_CACHE_MAX_ENTRIES)
+        return result.model_copy(deep=True)
         
     except Exception as e:
         print(f"Error recognizing food item: {e}")
         # Fallback response
-        return FoodRecognitionResponse(
+        return FoodRecognitionResponse.model_construct(
             name="Food Item",
             confidence=0.3,
             suggestions=[],
@@ -1075,13 +1753,13 @@ async def recognize_food(file: UploadFile = File(...)):
     
     try:
         # Read image bytes
-        image_bytes = await file.read()
+        image_bytes = await _read_upload(file)
         
         if len(image_bytes) == 0:
             raise HTTPException(status_code=400, detail="Empty image file")
         
         # Recognize food item
-        result = recognize_food_item(image_bytes)
+        result = await recognize_food_item(image_bytes)
         return result
         
     except HTTPException:
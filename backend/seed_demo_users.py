@@ -1,5 +1,5 @@
-from main import DB_PATH, hash_password, init_db
-import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from main import connect_db, hash_password, init_db
 
 
 def seed_demo_users() -> None:
@@ -13,22 +13,35 @@ def seed_demo_users() -> None:
       ("FreshTrack Tester", "test@example.com", "test1234"),
   ]
 
-  conn = sqlite3.connect(DB_PATH)
+  conn = connect_db()
   try:
-      cur = conn.cursor()
-      for name, email, password in users:
-          # Skip if email already exists
-          cur.execute("SELECT id FROM users WHERE email = ?", (email.lower(),))
-          existing = cur.fetchone()
-          if existing:
-              continue
-
-          password_hash = hash_password(password)
-          cur.execute(
+      emails = [email.lower() for _, email, _ in users]
+      placeholders = ",".join("?" * len(emails))
+      # Skip emails that already exist
+      existing = {
+          row[0]
+          for row in conn.execute(
+              f"SELECT email FROM users WHERE email IN ({placeholders})", emails
+          )
+      }
+      missing = [
+          (name, email.lower(), password)
+          for name, email, password in users
+          if email.lower() not in existing
+      ]
+      # Argon2 and PBKDF2 both release the GIL, so hash all passwords at once
+      with ThreadPoolExecutor(max_workers=max(len(missing), 1)) as pool:
+          hashes = list(pool.map(hash_password, [password for _, _, password in missing]))
+      rows = [
+          (name, email, password_hash)
+          for (name, email, _), password_hash in zip(missing, hashes)
+      ]
+      # One transaction for the whole batch
+      with conn:
+          conn.executemany(
               "INSERT INTO users (name, email, password_hash) VALUES (?, ?, ?)",
-              (name, email.lower(), password_hash),
+              rows,
           )
-      conn.commit()
   finally:
       conn.close()
 